@@ -5,50 +5,104 @@ Reads sensor data from Arduino via serial port and stores it for the FastAPI ser
 import serial
 import json
 import time
-from collections import deque
-from threading import Thread, Lock
+from threading import Thread
+import numpy as np
 import logging
 
+try:
+    import orjson
+    json_loads = orjson.loads  # parses bytes directly; errors subclass json.JSONDecodeError
+except ImportError:
+    json_loads = json.loads
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 class ArduinoDataStore:
-    """Thread-safe storage for Arduino sensor data"""
+    """Sensor data storage shared between the serial thread and readers
+    
+    Samples go into fixed-size ring buffers, one float32 array per sensor.
+    There is a single writer (the serial thread), so writes take no lock.
+    Reads use a seqlock instead: the writer bumps a sequence number before
+    and after filling a slot (odd while a write is in progress), and a
+    reader copies the buffers, then retries if the sequence changed in the
+    meantime. Every stats result is therefore computed from one consistent
+    window of samples.
+    """
     
     def __init__(self, max_samples=100):
-        self.data_lock = Lock()
-        self.samples = deque(maxlen=max_samples)
+        self.max_samples = max_samples
+        self._light = np.zeros(max_samples, dtype=np.float32)
+        self._sound = np.zeros(max_samples, dtype=np.float32)
+        self._temp = np.zeros(max_samples, dtype=np.float32)
+        self._hr = np.zeros(max_samples, dtype=np.float32)
+        self._written = 0  # total samples ever written
+        self._seq = 0      # seqlock sequence number, odd while a slot is being written
         self.latest = None
         
     def add_sample(self, sample):
-        with self.data_lock:
-            self.samples.append(sample)
-            self.latest = sample
+        # Convert up front so a bad sample can't leave a slot half-written
+        light = _reading(sample, 'light')
+        sound = _reading(sample, 'sound')
+        temp = _reading(sample, 'temperature')
+        hr = _reading(sample, 'heart_rate')  # heart rate sensor was removed from the hardware
+        idx = self._written % self.max_samples
+        self._seq += 1
+        self._light[idx] = light
+        self._sound[idx] = sound
+        self._temp[idx] = temp
+        self._hr[idx] = hr
+        self._written += 1
+        self._seq += 1
+        self.latest = sample
             
     def get_latest(self):
-        with self.data_lock:
-            return self.latest
+        return self.latest
             
     def get_aggregated_stats(self, minutes=5):
-        """Get aggregated statistics for the last N minutes"""
-        with self.data_lock:
-            if not self.samples:
-                return None
-                
-            # Calculate means
-            light_values = [s['light'] for s in self.samples]
-            sound_values = [s['sound'] for s in self.samples]
-            temp_values = [s['temperature'] for s in self.samples]
-            hr_values = [s['heart_rate'] for s in self.samples]
+        """Get aggregated statistics for the last N minutes
+        
+        A mean is None when no stored sample carried that reading.
+        """
+        while True:
+            seq = self._seq
+            if seq & 1:
+                time.sleep(0)  # writer is mid-sample; let it finish
+                continue
+            # Until the ring wraps, the valid samples are exactly the first `count` slots
+            count = min(self._written, self.max_samples)
+            light = self._light[:count].copy()
+            sound = self._sound[:count].copy()
+            temp = self._temp[:count].copy()
+            hr = self._hr[:count].copy()
+            if self._seq == seq:
+                break
+            
+        if not count:
+            return None
             
-            return {
-                'light_mean': sum(light_values) / len(light_values),
-                'sound_mean': sum(sound_values) / len(sound_values),
-                'temp_mean': sum(temp_values) / len(temp_values),
-                'hr_mean': sum(hr_values) / len(hr_values),
-                'sample_count': len(self.samples)
-            }
+        return {
+            'light_mean': _nanmean(light),
+            'sound_mean': _nanmean(sound),
+            'temp_mean': _nanmean(temp),
+            'hr_mean': _nanmean(hr),
+            'sample_count': count
+        }
+
+
+def _reading(sample, key):
+    """Sensor value from a sample, NaN when the sample doesn't carry a numeric one"""
+    try:
+        return float(sample[key])
+    except (KeyError, TypeError, ValueError):
+        return float('nan')
+
+
+def _nanmean(values):
+    """Mean ignoring missing (NaN) readings; None if every reading is missing"""
+    present = values[~np.isnan(values)]
+    return float(present.mean()) if present.size else None
 
 
 class ArduinoReader:
@@ -90,21 +144,29 @@ class ArduinoReader:
         
     def _read_loop(self):
         """Main reading loop (runs in background thread)"""
+        partial = b''
         while self.running:
             try:
-                if self.serial_conn.in_waiting > 0:
-                    line = self.serial_conn.readline().decode('utf-8').strip()
-                    if line:
-                        try:
-                            data = json.loads(line)
-                            self.data_store.add_sample(data)
-                            logger.debug(f"Received: {data}")
-                        except json.JSONDecodeError as e:
-                            logger.warning(f"Failed to parse JSON: {line} - {e}")
-                else:
-                    time.sleep(0.1)
+                # Blocks until a newline arrives or the serial timeout expires
+                chunk = self.serial_conn.readline()
+                if not chunk:
+                    continue
+                if not chunk.endswith(b'\n'):
+                    # Timed out mid-line; keep the fragment for the next read
+                    partial += chunk
+                    continue
+                line = (partial + chunk).strip()
+                partial = b''
+                if line:
+                    try:
+                        data = json_loads(line)
+                        self.data_store.add_sample(data)
+                        logger.debug(f"Received: {data}")
+                    except json.JSONDecodeError as e:
+                        logger.warning(f"Failed to parse JSON: {line.decode('utf-8', 'replace')} - {e}")
             except Exception as e:
                 logger.error(f"Error in read loop: {e}")
+                partial = b''
                 time.sleep(1)
 
 
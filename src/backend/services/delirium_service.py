@@ -7,6 +7,7 @@ This service provides ML-based delirium risk predictions using:
 
 Endpoints:
 - /predict-delirium: Manual prediction with all parameters
+- /predict-delirium/batch: Manual prediction for a list of patients in one call
 - /predict-delirium/from-arduino: Live prediction using Arduino sensors
 - /sensor-data/latest: Get latest sensor reading
 - /sensor-data/stats: Get aggregated sensor statistics
@@ -17,15 +18,83 @@ from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import numpy as np
 import joblib
+import logging
 import httpx
 import os
+import sys
+import threading
+import time
+import asyncio
+import bisect
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
 
 # Load pre-trained ML model and feature list at startup
 # Model trained on: sound_mean_db, sound_night_db, light_day_lux, light_night_lux, hr_mean, temp_mean, age
 model = joblib.load("../models/delirium_model.joblib")
 feature_cols = joblib.load("../models/delirium_features.joblib")
 
-app = FastAPI(title="Delirium Risk Classifier")
+# Unwrap the pipeline once so requests skip sklearn/DMatrix overhead:
+# scaling is applied by hand and the raw XGBoost booster predicts in place
+_scaler = model.named_steps["scaler"]
+_booster = model.named_steps["clf"].get_booster()
+_SCALER_MEAN = _scaler.mean_.astype(np.float32)
+_SCALER_SCALE = _scaler.scale_.astype(np.float32)
+
+# Ahead-of-time compiled trees (built by train_delirium_model.py via tl2cgen) are
+# used when available; otherwise the booster predicts directly
+PREDICTOR_LIB = os.getenv(
+    "DELIRIUM_PREDICTOR_LIB",
+    "../models/delirium_predictor" + (".dll" if sys.platform == "win32" else ".so"),
+)
+try:
+    import tl2cgen
+    _predictor = tl2cgen.Predictor(PREDICTOR_LIB) if os.path.exists(PREDICTOR_LIB) else None
+except ImportError:
+    _predictor = None
+
+if _predictor is not None:
+    # The library may be stale (built from an earlier model); only trust it
+    # if it agrees with the loaded booster on a few probe rows
+    _probe = np.random.default_rng(0).standard_normal((16, len(feature_cols)), dtype=np.float32)
+    _expected = _booster.inplace_predict(_probe)
+    _actual = _predictor.predict(tl2cgen.DMatrix(_probe)).reshape(-1)
+    if not np.allclose(_actual, _expected, rtol=1e-4, atol=1e-5):
+        logger.warning(f"{PREDICTOR_LIB} does not match the loaded model - using the XGBoost booster")
+        _predictor = None
+
+# One reusable (1, n_features) input row per worker thread
+_row_buffers = threading.local()
+
+# Global feature importance is fixed once the model is trained - rank it once
+TOP_FEATURES = [
+    name for name, _ in sorted(
+        zip(feature_cols, model.named_steps["clf"].feature_importances_),
+        key=lambda t: -t[1],
+    )[:3]
+]
+
+# Inputs are rounded before caching so near-identical sensor readings share an entry
+PREDICTION_CACHE_DECIMALS = 4
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Share one pooled HTTP client for sensor API calls across all requests"""
+    app.state.http = httpx.AsyncClient(
+        base_url=SENSOR_API_URL,
+        timeout=5.0,
+        limits=httpx.Limits(max_keepalive_connections=32),
+    )
+    try:
+        yield
+    finally:
+        await app.state.http.aclose()
+
+
+app = FastAPI(title="Delirium Risk Classifier", lifespan=lifespan)
 
 # Enable CORS to allow requests from frontend (port 3000) and backend (port 3001)
 app.add_middleware(
@@ -39,6 +108,11 @@ app.add_middleware(
 # URL for Node.js sensor API that reads Arduino data
 SENSOR_API_URL = os.getenv("SENSOR_API_URL", "http://localhost:4002")
 
+# Sensor stats are reused for this many seconds so request bursts share one fetch
+SENSOR_STATS_TTL_S = 0.5
+_stats_cache = {"t": float("-inf"), "v": None}
+_stats_lock = asyncio.Lock()
+
 
 class DeliriumInput(BaseModel):
     """Input model for delirium prediction with all required environmental factors"""
@@ -59,6 +133,12 @@ class DeliriumOutput(BaseModel):
     top_features: list[str]        # Top 3 contributing features to risk
 
 
+# Lower bounds of MEDIUM and HIGH; a score equal to a bound falls in the higher level
+_RISK_THRESHOLDS = (0.2, 0.5)
+_RISK_LEVELS = ("LOW", "MEDIUM", "HIGH")
+_RISK_LEVELS_ARR = np.array(_RISK_LEVELS)
+
+
 def risk_level_from_score(score: float) -> str:
     """Convert probability score to categorical risk level
     
@@ -68,64 +148,136 @@ def risk_level_from_score(score: float) -> str:
     Returns:
         Risk category: LOW (<20%), MEDIUM (20-50%), or HIGH (>50%)
     """
-    if score < 0.2:
-        return "LOW"
-    elif score < 0.5:
-        return "MEDIUM"
-    else:
-        return "HIGH"
+    return _RISK_LEVELS[bisect.bisect_right(_RISK_THRESHOLDS, score)]
 
 
-@app.get("/sensor-data/latest")
-async def get_latest_sensor_data():
-    """Get the most recent sensor reading from Node.js API"""
-    async with httpx.AsyncClient() as client:
+def _predict_scaled(x: np.ndarray) -> np.ndarray:
+    """Probabilities for already-scaled float32 rows"""
+    if _predictor is not None:
+        return _predictor.predict(tl2cgen.DMatrix(x)).reshape(-1)
+    return _booster.inplace_predict(x)
+
+
+def predict_proba_row(values) -> float:
+    """Predict delirium probability for a single row of features
+    
+    Args:
+        values: Feature values in the same order as feature_cols
+    
+    Returns:
+        Probability of delirium (0.0 to 1.0)
+    """
+    buf = getattr(_row_buffers, "row", None)
+    if buf is None:
+        buf = _row_buffers.row = np.empty((1, len(feature_cols)), dtype=np.float32)
+
+    for i, value in enumerate(values):
+        buf[0, i] = value
+    buf -= _SCALER_MEAN
+    buf /= _SCALER_SCALE
+
+    return float(_predict_scaled(buf)[0])
+
+
+def predict_proba_batch(x: np.ndarray) -> np.ndarray:
+    """Predict delirium probabilities for a (n_samples, n_features) float32 array in one call
+    
+    The array is scaled in place.
+    """
+    x -= _SCALER_MEAN
+    x /= _SCALER_SCALE
+    return _predict_scaled(x)
+
+
+@lru_cache(maxsize=1024)
+def _cached_proba(row: tuple) -> float:
+    return predict_proba_row(row)
+
+
+def predict_proba_cached(values) -> float:
+    """Same as predict_proba_row, memoized on the rounded feature values"""
+    return _cached_proba(tuple(round(float(v), PREDICTION_CACHE_DECIMALS) for v in values))
+
+
+async def fetch_sensor_stats() -> dict:
+    """Fetch aggregated sensor statistics, reusing a response younger than SENSOR_STATS_TTL_S
+    
+    Raises:
+        HTTPException: If sensor API is unavailable (503)
+    """
+    if time.monotonic() - _stats_cache["t"] < SENSOR_STATS_TTL_S:
+        return _stats_cache["v"]
+
+    async with _stats_lock:
+        # Another request may have refreshed the cache while we waited
+        if time.monotonic() - _stats_cache["t"] < SENSOR_STATS_TTL_S:
+            return _stats_cache["v"]
         try:
-            response = await client.get(f"{SENSOR_API_URL}/api/sensors/latest", timeout=5.0)
+            response = await app.state.http.get("/api/sensors/stats")
             response.raise_for_status()
-            return response.json()
+            stats = response.json()
         except httpx.HTTPError as e:
             raise HTTPException(status_code=503, detail=f"Sensor API unavailable: {str(e)}")
+        _stats_cache["v"] = stats
+        _stats_cache["t"] = time.monotonic()
+        return stats
+
+
+@app.get("/sensor-data/latest")
+async def get_latest_sensor_data():
+    """Get the most recent sensor reading from Node.js API"""
+    try:
+        response = await app.state.http.get("/api/sensors/latest")
+        response.raise_for_status()
+        return response.json()
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=503, detail=f"Sensor API unavailable: {str(e)}")
 
 
 @app.get("/sensor-data/stats")
 async def get_sensor_stats():
     """Get aggregated sensor statistics from Node.js API"""
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(f"{SENSOR_API_URL}/api/sensors/stats", timeout=5.0)
-            response.raise_for_status()
-            return response.json()
-        except httpx.HTTPError as e:
-            raise HTTPException(status_code=503, detail=f"Sensor API unavailable: {str(e)}")
+    return await fetch_sensor_stats()
 
 
 @app.post("/predict-delirium", response_model=DeliriumOutput)
 def predict_delirium(input_data: DeliriumInput):
     # Arrange inputs in correct feature order
-    x = np.array([[getattr(input_data, f) for f in feature_cols]])
-
-    proba = float(model.predict_proba(x)[0, 1])
+    proba = predict_proba_cached(getattr(input_data, f) for f in feature_cols)
     label = int(proba >= 0.5)
     level = risk_level_from_score(proba)
 
-    # Simple global feature importance
-    xgb_model = model.named_steps["clf"]
-    importances = xgb_model.feature_importances_
-    feature_importance_pairs = sorted(
-        zip(feature_cols, importances),
-        key=lambda t: -t[1],
-    )
-    top_features = [name for name, _ in feature_importance_pairs[:3]]
-
     return DeliriumOutput(
         risk_score=proba,
         risk_level=level,
         label=label,
-        top_features=top_features,
+        top_features=TOP_FEATURES,
     )
 
 
+@app.post("/predict-delirium/batch", response_model=list[DeliriumOutput])
+def predict_delirium_batch(inputs: list[DeliriumInput]):
+    """Score several patients with a single XGBoost call"""
+    x = np.empty((len(inputs), len(feature_cols)), dtype=np.float32)
+    for i, input_data in enumerate(inputs):
+        for j, f in enumerate(feature_cols):
+            x[i, j] = getattr(input_data, f)
+
+    probas = predict_proba_batch(x)
+    labels = probas >= 0.5
+    levels = _RISK_LEVELS_ARR[np.digitize(probas, _RISK_THRESHOLDS)]
+
+    return [
+        DeliriumOutput(
+            risk_score=float(proba),
+            risk_level=str(level),
+            label=int(label),
+            top_features=TOP_FEATURES,
+        )
+        for proba, level, label in zip(probas, levels, labels)
+    ]
+
+
 @app.get("/predict-delirium/from-arduino", response_model=DeliriumOutput)
 async def predict_delirium_from_arduino(age: float = 75.0):
     """
@@ -148,13 +300,7 @@ async def predict_delirium_from_arduino(age: float = 75.0):
     """
     # Fetch aggregated sensor statistics from Node.js API
     # Stats include: sound_mean, light_mean, temp_mean, temp_min, temp_max
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(f"{SENSOR_API_URL}/api/sensors/stats", timeout=5.0)
-            response.raise_for_status()
-            stats = response.json()
-        except httpx.HTTPError as e:
-            raise HTTPException(status_code=503, detail=f"Sensor API unavailable: {str(e)}")
+    stats = await fetch_sensor_stats()
     
     # Map Arduino sensor data to ML model feature requirements
     # Note: Using same value for day/night since Arduino doesn't track time of day
@@ -170,24 +316,13 @@ async def predict_delirium_from_arduino(age: float = 75.0):
     }
     
     # Arrange inputs in correct feature order
-    x = np.array([[input_dict[f] for f in feature_cols]])
-    
-    proba = float(model.predict_proba(x)[0, 1])
+    proba = predict_proba_cached(input_dict[f] for f in feature_cols)
     label = int(proba >= 0.5)
     level = risk_level_from_score(proba)
     
-    # Get feature importance
-    xgb_model = model.named_steps["clf"]
-    importances = xgb_model.feature_importances_
-    feature_importance_pairs = sorted(
-        zip(feature_cols, importances),
-        key=lambda t: -t[1],
-    )
-    top_features = [name for name, _ in feature_importance_pairs[:3]]
-    
     return DeliriumOutput(
         risk_score=proba,
         risk_level=level,
         label=label,
-        top_features=top_features,
+        top_features=TOP_FEATURES,
     )
\ No newline at end of file
@@ -1,50 +1,71 @@
 # generate_synthetic_delirium_data.py
 # generates this csv: patient_id,window_id,sound_mean_db,sound_night_db,light_day_lux,light_night_lux,hr_mean,temp_mean,age,delirium_risk,delirium_label
 import numpy as np
-import pandas as pd
-from backend.services.rules_delirium import compute_delirium_risk_df
+from backend.services.rules_delirium import compute_delirium_risk_np
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:  # pyarrow is optional; np.savetxt is used instead
+    pa = None
 
 N = 100_000  # number of windows (e.g., 6h windows across patients)
 
 rng = np.random.default_rng(seed=42)
 
-# Synthetic patients: skew older to get signal
-patient_ids = rng.integers(1, 5000, size=N)  # 5k patients
-window_ids = np.arange(N)
-
-# Sound (dB)
-sound_mean_db = rng.normal(loc=55, scale=10, size=N)       # overall
-sound_night_db = rng.normal(loc=50, scale=12, size=N)      # slightly quieter
-# Inject some very noisy windows
-mask_noisy_night = rng.random(N) < 0.2
-sound_night_db[mask_noisy_night] += rng.normal(loc=20, scale=5, size=mask_noisy_night.sum())
-
-# Light (lux)
-light_day_lux = rng.lognormal(mean=4.5, sigma=0.5, size=N)   # ~90–3000 lux
-light_night_lux = rng.lognormal(mean=1.5, sigma=0.5, size=N) # ~3–30 lux
-# Inject circadian disruption cases (similar day/night)
-mask_circadian_bad = rng.random(N) < 0.2
-light_day_lux[mask_circadian_bad] = rng.lognormal(mean=3.2, sigma=0.3, size=mask_circadian_bad.sum())
-light_night_lux[mask_circadian_bad] = rng.lognormal(mean=3.0, sigma=0.3, size=mask_circadian_bad.sum())
-
-# Heart rate (bpm)
-hr_mean = rng.normal(loc=80, scale=15, size=N)
-mask_tachy = rng.random(N) < 0.15
-hr_mean[mask_tachy] += rng.normal(loc=25, scale=10, size=mask_tachy.sum())
-
-# Temperature (°C)
-temp_mean = rng.normal(loc=37.0, scale=0.4, size=N)
-mask_fever = rng.random(N) < 0.1
-temp_mean[mask_fever] += rng.normal(loc=1.3, scale=0.3, size=mask_fever.sum())
-
-# Age (years)
-age = rng.normal(loc=72, scale=12, size=N)
-age = np.clip(age, 18, 100)
-
-df = pd.DataFrame(
-    {
-        "patient_id": patient_ids,
-        "window_id": window_ids,
+
+# Features are drawn directly as float32 (half the memory traffic of float64)
+def normal32(loc, scale, size):
+    return rng.standard_normal(size, dtype=np.float32) * scale + loc
+
+
+def lognormal32(mean, sigma, size):
+    return np.exp(normal32(mean, sigma, size))
+
+
+# Draw each class separately so the label ratio is fixed by construction
+# instead of depending on the seed
+TARGET_POSITIVE_RATIO = 0.3
+N_pos = int(N * TARGET_POSITIVE_RATIO)
+N_neg = N - N_pos
+
+# Per-class injection rates / age: positives lean towards tripping the rules in rules_delirium.py
+CLASS_PARAMS = {
+    1: dict(p_noisy_night=0.6, p_circadian_bad=0.5, p_tachy=0.4, p_fever=0.3, age_loc=80),
+    0: dict(p_noisy_night=0.1, p_circadian_bad=0.1, p_tachy=0.08, p_fever=0.05, age_loc=68),
+}
+
+
+def draw_windows(n, p_noisy_night, p_circadian_bad, p_tachy, p_fever, age_loc):
+    """Draw n windows of features (dict of float32 arrays)"""
+    # Sound (dB)
+    sound_mean_db = normal32(loc=55, scale=10, size=n)       # overall
+    sound_night_db = normal32(loc=50, scale=12, size=n)      # slightly quieter
+    # Inject some very noisy windows
+    # (injections draw a full-length array and select with np.where - one pass, no masked scatter)
+    sound_night_db += np.where(rng.random(n) < p_noisy_night, normal32(loc=20, scale=5, size=n), 0.0)
+
+    # Light (lux)
+    light_day_lux = lognormal32(mean=4.5, sigma=0.5, size=n)   # ~90–3000 lux
+    light_night_lux = lognormal32(mean=1.5, sigma=0.5, size=n) # ~3–30 lux
+    # Inject circadian disruption cases (similar day/night)
+    mask_circadian_bad = rng.random(n) < p_circadian_bad
+    light_day_lux = np.where(mask_circadian_bad, lognormal32(mean=3.2, sigma=0.3, size=n), light_day_lux)
+    light_night_lux = np.where(mask_circadian_bad, lognormal32(mean=3.0, sigma=0.3, size=n), light_night_lux)
+
+    # Heart rate (bpm)
+    hr_mean = normal32(loc=80, scale=15, size=n)
+    hr_mean += np.where(rng.random(n) < p_tachy, normal32(loc=25, scale=10, size=n), 0.0)
+
+    # Temperature (°C)
+    temp_mean = normal32(loc=37.0, scale=0.4, size=n)
+    temp_mean += np.where(rng.random(n) < p_fever, normal32(loc=1.3, scale=0.3, size=n), 0.0)
+
+    # Age (years)
+    age = normal32(loc=age_loc, scale=12, size=n)
+    age = np.clip(age, 18, 100)
+
+    return {
         "sound_mean_db": sound_mean_db,
         "sound_night_db": sound_night_db,
         "light_day_lux": light_day_lux,
@@ -53,13 +74,55 @@ df = pd.DataFrame(
         "temp_mean": temp_mean,
         "age": age,
     }
-)
 
-df = compute_delirium_risk_df(df)
 
-print(df.head())
-print(df["delirium_label"].value_counts(normalize=True))
+def draw_class(n, label):
+    """Draw n labelled windows whose rule-based label equals `label`
+
+    Windows that land in the other class are thrown away and only that
+    shortfall is redrawn.
+    """
+    parts = []
+    remaining = n
+    while remaining:
+        batch = draw_windows(remaining, **CLASS_PARAMS[label])
+        batch["delirium_risk"], batch["delirium_label"] = compute_delirium_risk_np(batch)
+        keep = batch["delirium_label"] == label
+        parts.append({name: arr[keep] for name, arr in batch.items()})
+        remaining -= int(keep.sum())
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+
+pos = draw_class(N_pos, 1)
+neg = draw_class(N_neg, 0)
+order = rng.permutation(N)
+windows = {name: np.concatenate([pos[name], neg[name]])[order] for name in pos}
+
+# Columns in CSV order; every column is its own contiguous array
+data = {
+    # Synthetic patients: skew older to get signal
+    "patient_id": rng.integers(1, 5000, size=N, dtype=np.int32),  # 5k patients
+    "window_id": np.arange(N, dtype=np.int32),
+    **windows,
+}
+
+print({name: arr[:3] for name, arr in data.items()})
+print(f"delirium_label=1 fraction: {data['delirium_label'].mean():.3f}")
 
-# Save to CSV
-df.to_csv("synthetic_delirium_data.csv", index=False)
+# Save to CSV (PyArrow's columnar writer is much faster than np.savetxt)
+if pa is not None:
+    pacsv.write_csv(
+        pa.table(data),
+        "synthetic_delirium_data.csv",
+        write_options=pacsv.WriteOptions(batch_size=65536),
+    )
+else:
+    np.savetxt(
+        "synthetic_delirium_data.csv",
+        np.column_stack(list(data.values())),
+        header=",".join(data),
+        fmt=["%d" if arr.dtype.kind in "iu" else "%.9g" for arr in data.values()],
+        delimiter=",",
+        comments="",
+    )
 print("Saved synthetic_delirium_data.csv")
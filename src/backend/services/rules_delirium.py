@@ -3,6 +3,18 @@ import numpy as np
 import pandas as pd
 from dataclasses import dataclass
 
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:  # numba is optional; fall back to plain Python
+    NUMBA_AVAILABLE = False
+    prange = range
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):  # bare @njit
+            return args[0]
+        return lambda func: func
+
 
 @dataclass
 class DeliriumRiskConfig:
@@ -16,6 +28,103 @@ class DeliriumRiskConfig:
     label_threshold: float = 0.50            # risk -> label
 
 
+# Risk factors, in the column order of compute_delirium_contributions and the
+# bit order of the factor masks returned by compute_delirium_risk_row (bit i = name i)
+CONTRIBUTION_NAMES = (
+    "night_noise",
+    "overall_noise",
+    "circadian_light",
+    "fever",
+    "tachycardia",
+    "age",
+)
+
+
+# Graded factors contribute min(cap, max(0, (value - threshold) / divisor))
+NIGHT_NOISE_CAP, NIGHT_NOISE_DIVISOR = 0.25, 40.0
+OVERALL_NOISE_CAP, OVERALL_NOISE_DIVISOR = 0.10, 50.0
+FEVER_CAP, FEVER_DIVISOR = 0.20, 2.0
+TACHY_CAP, TACHY_DIVISOR = 0.20, 40.0
+# On/off factors contribute a flat amount
+CIRCADIAN_RISK = 0.20
+AGE_RISK = 0.20
+
+
+# No fastmath: it lets LLVM assume inputs are never NaN, and a missing (NaN)
+# reading must simply trip no rule, as in the plain-Python version
+@njit
+def _risk_kernel(
+    sound_mean_db,
+    sound_night_db,
+    light_day_lux,
+    light_night_lux,
+    hr_mean,
+    temp_mean,
+    age,
+    noise_threshold_db,
+    fever_threshold_c,
+    tachy_threshold_bpm,
+    high_age_threshold,
+    circadian_ratio_threshold,
+    base_risk,
+    label_threshold,
+):
+    """
+    Scalar rules kernel (plain floats only so numba can compile it).
+    Returns (risk, label, factors, amounts): factors is the mask of triggered
+    factors and amounts the per-factor contributions, both in CONTRIBUTION_NAMES order.
+    """
+    # Every rule is gated by its threshold test, so a NaN reading contributes nothing
+    factors = 0
+
+    # 1) Noise (night-time noise is worse)
+    night_noise = 0.0
+    if sound_night_db > noise_threshold_db:
+        night_noise = min(NIGHT_NOISE_CAP, (sound_night_db - noise_threshold_db) / NIGHT_NOISE_DIVISOR)
+        factors |= 1 << 0
+    overall_noise = 0.0
+    if sound_mean_db > noise_threshold_db:
+        overall_noise = min(OVERALL_NOISE_CAP, (sound_mean_db - noise_threshold_db) / OVERALL_NOISE_DIVISOR)
+        factors |= 1 << 1
+
+    # 2) Light / circadian disruption
+    ratio = (light_day_lux + 1.0) / (light_night_lux + 1.0)
+    circadian_light = 0.0
+    if ratio < circadian_ratio_threshold:
+        circadian_light = CIRCADIAN_RISK
+        factors |= 1 << 2
+
+    # 3) Fever / infection
+    fever = 0.0
+    if temp_mean >= fever_threshold_c:
+        fever = min(FEVER_CAP, (temp_mean - fever_threshold_c) / FEVER_DIVISOR)
+        factors |= 1 << 3
+
+    # 4) Tachycardia
+    tachycardia = 0.0
+    if hr_mean >= tachy_threshold_bpm:
+        tachycardia = min(TACHY_CAP, (hr_mean - tachy_threshold_bpm) / TACHY_DIVISOR)
+        factors |= 1 << 4
+
+    # 5) Age
+    old_age = 0.0
+    if age >= high_age_threshold:
+        old_age = AGE_RISK
+        factors |= 1 << 5
+
+    risk = base_risk + night_noise + overall_noise + circadian_light + fever + tachycardia + old_age
+
+    # Clamp to [0,1]
+    risk = min(1.0, max(0.0, risk))
+    label = 1 if risk >= label_threshold else 0
+    return risk, label, factors, (night_noise, overall_noise, circadian_light, fever, tachycardia, old_age)
+
+
+def risk_factor_names(factors: int):
+    """Expand a factor mask from compute_delirium_risk_row into factor names"""
+    return [name for i, name in enumerate(CONTRIBUTION_NAMES) if factors >> i & 1]
+
+
 def compute_delirium_risk_row(
     sound_mean_db: float,
     sound_night_db: float,
@@ -25,55 +134,191 @@ def compute_delirium_risk_row(
     temp_mean: float,
     age: float,
     cfg: DeliriumRiskConfig = DeliriumRiskConfig(),
+    *,
+    contributions: dict = None,
 ):
     """
     Rule-based risk scoring inspired by known delirium risk factors.
     This is NOT clinically validated – use only for synthetic/prototyping.
+
+    Returns (risk, label, factors), where factors is a bitmask of the triggered
+    risk factors (bit i = CONTRIBUTION_NAMES[i], see risk_factor_names).
+    Pass a dict as `contributions` to also get each factor's risk contribution.
     """
-    risk = cfg.base_risk
+    risk, label, factors, amounts = _risk_kernel(
+        float(sound_mean_db),
+        float(sound_night_db),
+        float(light_day_lux),
+        float(light_night_lux),
+        float(hr_mean),
+        float(temp_mean),
+        float(age),
+        cfg.noise_threshold_db,
+        cfg.fever_threshold_c,
+        cfg.tachy_threshold_bpm,
+        cfg.high_age_threshold,
+        cfg.circadian_ratio_threshold,
+        cfg.base_risk,
+        cfg.label_threshold,
+    )
+    if contributions is not None:
+        for i, name in enumerate(CONTRIBUTION_NAMES):
+            if factors >> i & 1:
+                contributions[name] = float(amounts[i])
+    return float(risk), int(label), int(factors)
+
+
+def _check_risk_row(*features, cfg: DeliriumRiskConfig = DeliriumRiskConfig()):
+    """Sanity-check one row: the factor mask, the contributions and the risk must agree"""
     contributions = {}
+    risk, _, factors = compute_delirium_risk_row(*features, cfg=cfg, contributions=contributions)
+    assert risk_factor_names(factors) == list(contributions), (factors, contributions)
+    # On/off factors that are flagged must have added their flat amount
+    assert contributions.get("circadian_light", CIRCADIAN_RISK) == CIRCADIAN_RISK, contributions
+    assert contributions.get("age", AGE_RISK) == AGE_RISK, contributions
+    expected = min(1.0, max(0.0, cfg.base_risk + sum(contributions.values())))
+    assert abs(risk - expected) < 1e-9, (risk, contributions)
 
-    # 1) Noise (night-time noise is worse)
-    if sound_night_db > cfg.noise_threshold_db:
-        extra = min(0.25, (sound_night_db - cfg.noise_threshold_db) / 40.0)
-        risk += extra
-        contributions["night_noise"] = extra
 
-    if sound_mean_db > cfg.noise_threshold_db:
-        extra = min(0.10, (sound_mean_db - cfg.noise_threshold_db) / 50.0)
-        risk += extra
-        contributions["overall_noise"] = extra
+# Compile the kernel at import so the first request doesn't pay for it, and check
+# it on a row of missing (NaN) readings and on a row that trips every rule
+_check_risk_row(*[float("nan")] * 7)
+_check_risk_row(70.0, 70.0, 1.0, 1.0, 100.0, 38.0, 80.0)
+
+
+def _clamped_excess(values, threshold, scale, cap, out):
+    """out = min(cap, max(0, (values - threshold) / scale)), computed in place (NaN -> 0)"""
+    np.subtract(values, threshold, out=out)
+    out /= scale
+    np.fmax(out, 0.0, out=out)  # fmax: a NaN reading contributes 0, like the scalar rules
+    np.minimum(out, cap, out=out)
+
+
+def compute_delirium_contributions(data, cfg: DeliriumRiskConfig = DeliriumRiskConfig()):
+    """
+    Per-factor risk contributions for every row, as an (n_rows, len(CONTRIBUTION_NAMES))
+    column-major array (each factor is one contiguous column). Rows sum, plus
+    cfg.base_risk, to the unclamped risk of compute_delirium_risk_row.
+
+    `data` is a DataFrame or a dict of 1-D arrays with the feature columns.
+    """
+    sound_mean_db = np.asarray(data["sound_mean_db"])
+    sound_night_db = np.asarray(data["sound_night_db"])
+    light_day_lux = np.asarray(data["light_day_lux"])
+    light_night_lux = np.asarray(data["light_night_lux"])
+    hr_mean = np.asarray(data["hr_mean"])
+    temp_mean = np.asarray(data["temp_mean"])
+    age = np.asarray(data["age"])
+    # Work in the input precision (float32 stays float32), but never below float32
+    dtype = np.result_type(
+        sound_mean_db, sound_night_db, light_day_lux, light_night_lux,
+        hr_mean, temp_mean, age, np.float32,
+    )
+
+    # max(0, ...) replaces the "> threshold" gate (below threshold it contributes 0)
+    contribs = np.empty((len(sound_mean_db), len(CONTRIBUTION_NAMES)), dtype=dtype, order="F")
+
+    # 1) Noise
+    _clamped_excess(sound_night_db, cfg.noise_threshold_db, NIGHT_NOISE_DIVISOR, NIGHT_NOISE_CAP, out=contribs[:, 0])
+    _clamped_excess(sound_mean_db, cfg.noise_threshold_db, OVERALL_NOISE_DIVISOR, OVERALL_NOISE_CAP, out=contribs[:, 1])
 
     # 2) Light / circadian disruption
-    # If day is not much brighter than night, circadian disruption
     ratio = (light_day_lux + 1.0) / (light_night_lux + 1.0)
-    if ratio < cfg.circadian_ratio_threshold:
-        extra = 0.20
-        risk += extra
-        contributions["circadian_light"] = extra
+    np.multiply(ratio < cfg.circadian_ratio_threshold, CIRCADIAN_RISK, out=contribs[:, 2])
 
     # 3) Fever / infection
-    if temp_mean >= cfg.fever_threshold_c:
-        extra = min(0.20, (temp_mean - cfg.fever_threshold_c) / 2.0)
-        risk += extra
-        contributions["fever"] = extra
+    _clamped_excess(temp_mean, cfg.fever_threshold_c, FEVER_DIVISOR, FEVER_CAP, out=contribs[:, 3])
 
     # 4) Tachycardia
-    if hr_mean >= cfg.tachy_threshold_bpm:
-        extra = min(0.20, (hr_mean - cfg.tachy_threshold_bpm) / 40.0)
-        risk += extra
-        contributions["tachycardia"] = extra
+    _clamped_excess(hr_mean, cfg.tachy_threshold_bpm, TACHY_DIVISOR, TACHY_CAP, out=contribs[:, 4])
 
     # 5) Age
-    if age >= cfg.high_age_threshold:
-        extra = 0.20
-        risk += extra
-        contributions["age"] = extra
+    np.multiply(age >= cfg.high_age_threshold, AGE_RISK, out=contribs[:, 5])
+
+    return contribs
+
+
+# Fast-math flags minus nnan/ninf, so NaN readings are handled as in _risk_kernel
+@njit(parallel=True, fastmath={"contract", "arcp", "reassoc"})
+def _risk_kernel_parallel(
+    sound_mean_db,
+    sound_night_db,
+    light_day_lux,
+    light_night_lux,
+    hr_mean,
+    temp_mean,
+    age,
+    noise_threshold_db,
+    fever_threshold_c,
+    tachy_threshold_bpm,
+    high_age_threshold,
+    circadian_ratio_threshold,
+    base_risk,
+    label_threshold,
+    out_risk,
+    out_label,
+):
+    """_risk_kernel over whole columns, rows split across threads (numba only)."""
+    for i in prange(sound_mean_db.shape[0]):
+        risk, label, _, _ = _risk_kernel(
+            sound_mean_db[i],
+            sound_night_db[i],
+            light_day_lux[i],
+            light_night_lux[i],
+            hr_mean[i],
+            temp_mean[i],
+            age[i],
+            noise_threshold_db,
+            fever_threshold_c,
+            tachy_threshold_bpm,
+            high_age_threshold,
+            circadian_ratio_threshold,
+            base_risk,
+            label_threshold,
+        )
+        out_risk[i] = risk
+        out_label[i] = label
+
+
+def compute_delirium_risk_np(arrays, cfg: DeliriumRiskConfig = DeliriumRiskConfig()):
+    """
+    Vectorized rules on a dict of 1-D arrays (or a DataFrame) with the feature columns.
+    Returns (risk, label) arrays.
+
+    With numba installed this runs one multi-threaded pass over the rows;
+    otherwise it falls back to NumPy over compute_delirium_contributions.
+    """
+    if NUMBA_AVAILABLE:
+        columns = [np.asarray(arrays[c]) for c in (
+            "sound_mean_db", "sound_night_db", "light_day_lux", "light_night_lux",
+            "hr_mean", "temp_mean", "age",
+        )]
+        # Work in the input precision (float32 stays float32), but never below float32
+        dtype = np.result_type(*columns, np.float32)
+        risk = np.empty(len(columns[0]), dtype=dtype)
+        labels = np.empty(len(columns[0]), dtype=np.int8)
+        _risk_kernel_parallel(
+            *columns,
+            cfg.noise_threshold_db,
+            cfg.fever_threshold_c,
+            cfg.tachy_threshold_bpm,
+            cfg.high_age_threshold,
+            cfg.circadian_ratio_threshold,
+            cfg.base_risk,
+            cfg.label_threshold,
+            risk,
+            labels,
+        )
+        return risk, labels
+
+    contribs = compute_delirium_contributions(arrays, cfg)
+    risk = contribs.sum(axis=1, dtype=contribs.dtype)
+    risk += cfg.base_risk
 
     # Clamp to [0,1]
-    risk = float(np.clip(risk, 0.0, 1.0))
-    label = int(risk >= cfg.label_threshold)
-    return risk, label, contributions
+    np.clip(risk, 0.0, 1.0, out=risk)
+    labels = (risk >= cfg.label_threshold).astype(np.int8)
+    return risk, labels
 
 
 def compute_delirium_risk_df(df: pd.DataFrame, cfg: DeliriumRiskConfig = DeliriumRiskConfig()):
@@ -82,23 +327,10 @@ def compute_delirium_risk_df(df: pd.DataFrame, cfg: DeliriumRiskConfig = Deliriu
     ['sound_mean_db','sound_night_db','light_day_lux','light_night_lux',
      'hr_mean','temp_mean','age']
     """
-    risks = []
-    labels = []
-    for row in df.itertuples(index=False):
-        risk, label, _ = compute_delirium_risk_row(
-            sound_mean_db=row.sound_mean_db,
-            sound_night_db=row.sound_night_db,
-            light_day_lux=row.light_day_lux,
-            light_night_lux=row.light_night_lux,
-            hr_mean=row.hr_mean,
-            temp_mean=row.temp_mean,
-            age=row.age,
-            cfg=cfg,
-        )
-        risks.append(risk)
-        labels.append(label)
+    risk, labels = compute_delirium_risk_np(df, cfg)
 
-    df = df.copy()
-    df["delirium_risk"] = risks
+    # New frame over the caller's column buffers (no block copy); the caller's df is left untouched
+    df = pd.DataFrame({c: df[c].to_numpy() for c in df.columns}, index=df.index, copy=False)
+    df["delirium_risk"] = risk
     df["delirium_label"] = labels
-    return df
\ No newline at end of file
+    return df
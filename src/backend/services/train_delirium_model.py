@@ -1,3 +1,6 @@
+import glob
+import os
+import sys
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
@@ -20,7 +23,8 @@ feature_cols = [
     "age",
 ]
 
-X = df[feature_cols]
+# float32 matches what XGBoost uses internally and what the service feeds it
+X = df[feature_cols].astype("float32")
 y = df["delirium_label"].astype(int)
 
 # 3) Train/validation split
@@ -59,4 +63,29 @@ print(f"Validation PR-AUC:  {ap:.3f}")
 # 7) Save model & feature list
 joblib.dump(model, "delirium_model.joblib")
 joblib.dump(feature_cols, "delirium_features.joblib")
-print("Saved delirium_model.joblib and delirium_features.joblib")
\ No newline at end of file
+print("Saved delirium_model.joblib and delirium_features.joblib")
+
+# 8) Export the booster and, if treelite/tl2cgen are installed, compile it
+#    ahead of time into a shared library that delirium_service.py picks up
+booster = model.named_steps["clf"].get_booster()
+booster.save_model("delirium_booster.json")
+print("Saved delirium_booster.json")
+
+try:
+    import treelite
+    import tl2cgen
+except ImportError:
+    # Don't leave a library compiled from an older model next to the new one
+    for stale_lib in glob.glob("delirium_predictor.*"):
+        os.remove(stale_lib)
+        print(f"Removed stale {stale_lib}")
+    print("treelite/tl2cgen not installed - skipping compiled predictor")
+else:
+    predictor_lib = "delirium_predictor" + (".dll" if sys.platform == "win32" else ".so")
+    tl2cgen.export_lib(
+        treelite.frontend.load_xgboost_model("delirium_booster.json"),
+        toolchain="msvc" if sys.platform == "win32" else "gcc",
+        libpath=predictor_lib,
+        params={"parallel_comp": 4},
+    )
+    print(f"Saved {predictor_lib}")